@@ -4,9 +4,15 @@ Loads settings from environment variables with sensible defaults
 """
 
 import os
+from functools import lru_cache
+from ipaddress import ip_address, ip_network
 from pathlib import Path
 
 
+# Maximum number of client IPs whose whitelist network match is remembered
+NETWORK_VERDICT_CACHE_SIZE = 1024
+
+
 class Config:
     """Application configuration"""
     
@@ -22,6 +28,10 @@ class Config:
             str(self.DATA_DIR / 'messages.db')
         )
         
+        # Keep the full signal-cli envelope (raw_data) alongside each message;
+        # it is by far the largest column, so disable it to shrink the database
+        self.STORE_RAW_DATA = os.getenv('STORE_RAW_DATA', 'true').lower() not in ('0', 'false', 'no')
+        
         # Signal CLI configuration
         self.SIGNAL_CLI_URL = os.getenv(
             'SIGNAL_CLI_URL',
@@ -31,25 +41,49 @@ class Config:
         
         # API Security
         self.API_KEY = os.getenv('SIGNAL_API_KEY', 'CHANGE_ME_INSECURE_DEFAULT_KEY')
+        self.API_KEY_BYTES = self.API_KEY.encode('utf-8')
+        
+        # Optional shared secret for signing public webhook requests
+        # (HMAC-SHA256 of the body, hex encoded in the X-Signature header)
+        self.WEBHOOK_SECRET = os.getenv('SIGNAL_WEBHOOK_SECRET', '')
+        self.WEBHOOK_SECRET_BYTES = self.WEBHOOK_SECRET.encode('utf-8')
         
         # IP Whitelist for private interface (comma-separated)
-        # Example: "192.168.1.100,192.168.1.101,127.0.0.1"
+        # Example: "192.168.1.100,192.168.1.101,127.0.0.1,10.0.0.0/24"
+        # Entries may be single addresses or CIDR networks ("192.168.1.0/24")
         whitelist_str = os.getenv('PRIVATE_API_WHITELIST', '127.0.0.1')
         self.PRIVATE_API_WHITELIST = [ip.strip() for ip in whitelist_str.split(',') if ip.strip()]
         
+        # Precompiled lookup structures so each request is a set hit
+        self.PRIVATE_API_WHITELIST_IPS = frozenset(
+            ip for ip in self.PRIVATE_API_WHITELIST if '/' not in ip
+        )
+        nets = []
+        self._invalid_whitelist_entries = []
+        for entry in self.PRIVATE_API_WHITELIST:
+            if '/' in entry:
+                try:
+                    nets.append(ip_network(entry, strict=False))
+                except ValueError:
+                    self._invalid_whitelist_entries.append(entry)
+        self.PRIVATE_API_WHITELIST_NETS = tuple(nets)
+        # Network-match verdicts per client IP, so repeat clients skip parsing
+        self._network_verdicts = {}
+        
         # Create directories if they don't exist (only if writable)
-        # systemd services have these directories created by install.sh
-        try:
-            self.DATA_DIR.mkdir(parents=True, exist_ok=True)
-        except (PermissionError, OSError):
-            # Directory should already exist from install.sh
-            pass
-            
-        try:
-            self.LOG_DIR.mkdir(parents=True, exist_ok=True)
-        except (PermissionError, OSError):
-            # Directory should already exist from install.sh
-            pass
+        # systemd services have these directories created by install.sh,
+        # so a single stat is usually enough and mkdir is skipped
+        for directory in (self.DATA_DIR, self.LOG_DIR):
+            try:
+                os.stat(directory)
+            except FileNotFoundError:
+                try:
+                    directory.mkdir(parents=True, exist_ok=True)
+                except (PermissionError, OSError):
+                    # Directory should already exist from install.sh
+                    pass
+            except OSError:
+                pass
         
     def validate(self):
         """Validate configuration"""
@@ -61,4 +95,37 @@ class Config:
         if not self.SIGNAL_PHONE_NUMBER:
             errors.append("SIGNAL_PHONE_NUMBER environment variable must be set")
         
+        for entry in self._invalid_whitelist_entries:
+            errors.append(f"Invalid network in PRIVATE_API_WHITELIST: {entry}")
+        
         return errors
+    
+    def is_ip_whitelisted(self, client_ip: str) -> bool:
+        """Check whether a client IP is allowed on the private interface"""
+        if client_ip in self.PRIVATE_API_WHITELIST_IPS:
+            return True
+        
+        if not self.PRIVATE_API_WHITELIST_NETS:
+            return False
+        
+        verdict = self._network_verdicts.get(client_ip)
+        if verdict is not None:
+            return verdict
+        
+        try:
+            address = ip_address(client_ip)
+            verdict = any(address in net for net in self.PRIVATE_API_WHITELIST_NETS)
+        except ValueError:
+            verdict = False
+        
+        # Bound the cache so a scan from many addresses can't grow it forever
+        if len(self._network_verdicts) >= NETWORK_VERDICT_CACHE_SIZE:
+            self._network_verdicts.clear()
+        self._network_verdicts[client_ip] = verdict
+        return verdict
+
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Return the process-wide Config, parsing the environment only once"""
+    return Config()
@@ -5,52 +5,247 @@ This service provides two interfaces:
 2. Private interface (port 9000) - Sends Signal messages (internal only)
 """
 
-import os
 import sys
 from pathlib import Path
 
-# Add project root to Python path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+# Add project root to Python path (only missing when run as a script)
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
 
-from fastapi import FastAPI, HTTPException, Request, Depends, Security
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Depends, Security
 from fastapi.security.api_key import APIKeyHeader
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, NamedTuple, Dict, Tuple, Any, Literal
 import uvicorn
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
 import logging
+import logging.handlers
+import queue
+import random
+import re
+import atexit
 import asyncio
+import hmac
+import sqlite3
+import time
 import httpx
-import json
+import orjson
 
 from database.db import Database
-from backend.signal_client import SignalClient
-from backend.config import Config
+from backend.signal_client import SignalClient, SignalAPIError, CONNECTION_LIMITS
+from backend.config import get_config
 
 # Configure logging
+# Records are formatted on the caller's thread and handed to a queue; a
+# listener thread does the actual file/stdout writes off the event loop
+log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('/var/log/signal-controller/app.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    logging.FileHandler('/var/log/signal-controller/app.log'),
+    logging.StreamHandler(sys.stdout)
+)
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize
-config = Config()
+config = get_config()
 db = Database(config.DATABASE_PATH)
-signal_client = SignalClient(config.SIGNAL_CLI_URL)
+
+# One HTTP client (and connection pool) for everything that talks to
+# signal-cli; the SSE stream needs no timeout, RPC calls set their own.
+# trust_env=False skips proxy/netrc lookups from the environment.
+http_client = httpx.AsyncClient(timeout=None, trust_env=False, limits=CONNECTION_LIMITS)
+signal_client = SignalClient(config.SIGNAL_CLI_URL, client=http_client)
+
+# All writes go through one thread (and so one SQLite connection), so they never
+# contend for the database write lock; reads keep using the default pool
+db_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking Database call in a worker thread to keep the event loop free"""
+    return await asyncio.to_thread(func, *args, **kwargs)
+
+
+async def run_db_write(func, *args, **kwargs):
+    """Run a blocking Database write on the dedicated writer thread"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_writer, partial(func, *args, **kwargs))
+
+
+# Short-lived cache for aggregate reads polled by dashboards (/stats, /conversations, /groups)
+READ_CACHE_TTL = 5.0  # seconds
+READ_CACHE_SIZE = 64
+READ_CACHE_CONTROL = f"private, max-age={int(READ_CACHE_TTL)}"
+_read_cache: Dict[tuple, Tuple[float, int, Any]] = {}
+
+
+async def cached_read(func, *args):
+    """
+    Run a read-only Database call, reusing its result for READ_CACHE_TTL seconds
+    Writes made by this process bump db.version and invalidate the cached result immediately
+    """
+    key = (func.__name__, *args)
+    now = time.monotonic()
+    entry = _read_cache.get(key)
+    if entry is not None and entry[0] > now and entry[1] == db.version:
+        return entry[2]
+    
+    version = db.version
+    value = await run_db(func, *args)
+    if len(_read_cache) >= READ_CACHE_SIZE:
+        _read_cache.clear()
+    _read_cache[key] = (now + READ_CACHE_TTL, version, value)
+    return value
+
+
+def now_ms() -> int:
+    """Current time in epoch milliseconds"""
+    return time.time_ns() // 1_000_000
+
+
+# Sender fields present on a regular signal-cli message envelope,
+# fetched in a single C-level call on the common path
+_ENVELOPE_FIELDS = itemgetter('sourceNumber', 'sourceName', 'timestamp')
+
+
+class ParsedMessage(NamedTuple):
+    """Message fields extracted from a signal-cli envelope (names match Database.store_message)"""
+    sender_number: str
+    sender_name: str
+    timestamp: int
+    message_body: str
+    group_id: Optional[str]
+    group_name: Optional[str]
+    attachments: Optional[list]
+    envelope_uid: Optional[str]
+
+
+def parse_envelope(data: dict) -> Optional[ParsedMessage]:
+    """
+    Extract the stored fields from a signal-cli event
+    Shared by the SSE listener and the webhook endpoint
+    Returns None for non-message events (typing indicators, receipts, etc.)
+    Raises ValueError for events that aren't shaped like signal-cli's
+    """
+    if not isinstance(data, dict):
+        raise ValueError("event is not a JSON object")
+    
+    envelope = data.get('envelope') or {}
+    if not isinstance(envelope, dict):
+        raise ValueError("envelope is not a JSON object")
+    
+    data_message = envelope.get('dataMessage')
+    if data_message is None:
+        return None
+    if not isinstance(data_message, dict):
+        raise ValueError("dataMessage is not a JSON object")
+    
+    # Extract sender data
+    try:
+        source_number, source_name, timestamp = _ENVELOPE_FIELDS(envelope)
+    except KeyError:
+        source_number = envelope.get('sourceNumber')
+        source_name = envelope.get('sourceName')
+        timestamp = envelope.get('timestamp')
+    
+    # One sender identity for both the stored sender_number and the dedup key
+    source = source_number or envelope.get('source') or envelope.get('sourceUuid')
+    
+    # A sender and their send timestamp identify an event, so replays of the
+    # same envelope (SSE reconnects, webhook retries) are stored only once
+    envelope_uid = f"{source}:{timestamp}" if source and timestamp is not None else None
+    if timestamp is None:
+        timestamp = now_ms()
+    
+    # Get group info if this is a group message
+    group_info = data_message.get('groupInfo')
+    if group_info is not None and not isinstance(group_info, dict):
+        raise ValueError("groupInfo is not a JSON object")
+    
+    # Get attachments if any (most messages have none, so skip the build)
+    attachments = data_message.get('attachments')
+    if attachments and not (isinstance(attachments, list) and all(isinstance(att, dict) for att in attachments)):
+        raise ValueError("attachments is not a list of JSON objects")
+    attachment_info = [
+        {
+            'content_type': att.get('contentType', ''),
+            'filename': att.get('filename', ''),
+            'id': att.get('id', ''),
+            'size': att.get('size', 0)
+        }
+        for att in attachments
+    ] if attachments else None
+    
+    return ParsedMessage(
+        sender_number=source or 'unknown',
+        sender_name=source_name or '',
+        timestamp=timestamp,
+        message_body=data_message.get('message', ''),
+        group_id=group_info.get('groupId') if group_info else None,
+        group_name=group_info.get('groupName') if group_info else None,
+        attachments=attachment_info,
+        envelope_uid=envelope_uid
+    )
+
+
+# Cached timestamp for /health responses, refreshed once per second
+_health_timestamp = datetime.now().isoformat()
+
+
+async def refresh_health_timestamp():
+    """Background task that keeps the cached /health timestamp current"""
+    global _health_timestamp
+    while True:
+        _health_timestamp = datetime.now().isoformat()
+        await asyncio.sleep(1)
+
+
+# Incoming SSE messages are queued and written to the database in batches;
+# a None item (queued at shutdown) tells the writer to flush and stop
+_write_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_DELAY = 0.05  # seconds
+
+# Background tasks of the public app, kept so shutdown can stop them in order
+_listener_task: Optional[asyncio.Task] = None
+_writer_task: Optional[asyncio.Task] = None
 
 # API Key security for private interface
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=True)
 
+def is_valid_api_key(api_key: Optional[str]) -> bool:
+    """Compare an API key against the configured one in constant time"""
+    if api_key is None:
+        return False
+    return hmac.compare_digest(api_key.encode('utf-8'), config.API_KEY_BYTES)
+
+def is_valid_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """Check the HMAC-SHA256 signature of a webhook body against the shared secret"""
+    if not signature:
+        return False
+    try:
+        expected = bytes.fromhex(signature)
+    except ValueError:
+        return False
+    digest = hmac.digest(config.WEBHOOK_SECRET_BYTES, body, 'sha256')
+    return hmac.compare_digest(digest, expected)
+
 def verify_api_key(api_key: str = Security(api_key_header)):
     """Verify API key for private interface"""
-    if api_key != config.API_KEY:
+    if not is_valid_api_key(api_key):
         logger.warning(f"Invalid API key attempt")
         raise HTTPException(status_code=403, detail="Invalid API key")
     return api_key
@@ -59,7 +254,7 @@ def verify_ip_whitelist(request: Request):
     """Verify client IP is in whitelist for private interface"""
     client_ip = request.client.host
     
-    if client_ip not in config.PRIVATE_API_WHITELIST:
+    if not config.is_ip_whitelisted(client_ip):
         logger.warning(f"Unauthorized IP access attempt from {client_ip}")
         raise HTTPException(
             status_code=403, 
@@ -69,94 +264,128 @@ def verify_ip_whitelist(request: Request):
     return client_ip
 
 
+# Backoff between SSE reconnect attempts (seconds)
+SSE_RECONNECT_BASE_DELAY = 1.0
+SSE_RECONNECT_MAX_DELAY = 60.0
+
+
 async def listen_to_signal_events():
     """
     Background task to listen to signal-cli SSE stream for incoming messages
     """
     logger.info("Starting SSE listener for signal-cli events")
     
+    # The shared client outlives reconnects, so only the stream is reopened
+    attempt = 0
     while True:
         try:
-            async with httpx.AsyncClient(timeout=None) as client:
-                async with client.stream('GET', f'{config.SIGNAL_CLI_URL}/api/v1/events') as response:
-                    logger.info("Connected to signal-cli events stream")
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith('data:'):
-                            # Extract JSON data from SSE format
+            async with http_client.stream('GET', f'{config.SIGNAL_CLI_URL}/api/v1/events') as response:
+                logger.info("Connected to signal-cli events stream")
+                attempt = 0
+                
+                # Frame the stream ourselves on raw bytes instead of
+                # decoding every line to str with aiter_lines()
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes(65536):
+                    buffer += chunk
+                    while (newline := buffer.find(b'\n')) != -1:
+                        line = bytes(buffer[:newline])
+                        del buffer[:newline + 1]
+                        
+                        if line.startswith(b'data:'):
+                            # Keep the raw bytes so they can be stored as-is
                             json_data = line[5:].strip()  # Remove 'data:' prefix
                             
+                            # Typing indicators, receipts etc. carry no
+                            # dataMessage; skip them without parsing
+                            if b'"dataMessage"' not in json_data:
+                                continue
+                            
                             try:
-                                data = json.loads(json_data)
-                                await process_incoming_message(data)
-                            except json.JSONDecodeError as e:
+                                data = orjson.loads(json_data)
+                                await process_incoming_message(data, json_data)
+                            except orjson.JSONDecodeError as e:
                                 logger.error(f"Failed to parse SSE data: {e}")
                                 
         except Exception as e:
             logger.error(f"SSE connection error: {e}")
-            logger.info("Reconnecting in 5 seconds...")
-            await asyncio.sleep(5)
+        
+        # Exponential backoff with jitter while signal-cli stays unreachable;
+        # also keeps a cleanly closed stream from being reopened in a tight loop
+        delay = min(SSE_RECONNECT_MAX_DELAY, SSE_RECONNECT_BASE_DELAY * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        attempt += 1
+        logger.info("Reconnecting in %.1f seconds...", delay)
+        await asyncio.sleep(delay)
 
 
-async def process_incoming_message(data: dict):
-    """Process an incoming message from signal-cli"""
+async def process_incoming_message(data: dict, raw_data: Optional[bytes] = None):
+    """
+    Process an incoming message from signal-cli
+    raw_data is the original JSON payload, stored instead of re-serializing data
+    """
     try:
-        envelope = data.get('envelope', {})
+        message = parse_envelope(data)
         
         # Skip non-message events (typing indicators, receipts, etc.)
-        if 'dataMessage' not in envelope:
+        if message is None:
             return
         
-        # Extract message data
-        source_number = envelope.get('sourceNumber', envelope.get('source', 'unknown'))
-        source_name = envelope.get('sourceName', '')
-        timestamp = envelope.get('timestamp', int(datetime.now().timestamp() * 1000))
+        # Queue message for the batched database writer
+        # (the conversation entry is updated together with the message)
+        if not config.STORE_RAW_DATA:
+            raw_data = None
+        elif raw_data is None:
+            raw_data = data
+        await _write_queue.put({**message._asdict(), 'raw_data': raw_data})
         
-        # Get message content
-        data_message = envelope.get('dataMessage', {})
-        message_body = data_message.get('message', '')
+        if message.group_id:
+            logger.info("Queued group message from %s in group %r: %s",
+                        message.sender_number, message.group_name, message.message_body[:50])
+        else:
+            logger.info("Queued message from %s: %s", message.sender_number, message.message_body[:50])
         
-        # Get group info if this is a group message
-        group_info = data_message.get('groupInfo', {})
-        group_id = group_info.get('groupId') if group_info else None
-        group_name = group_info.get('groupName') if group_info else None
+    except Exception as e:
+        logger.error(f"Error processing message: {e}", exc_info=True)
+
+
+async def write_incoming_messages():
+    """
+    Background task that drains the write queue and stores messages in batches
+    Collects up to WRITE_BATCH_SIZE messages or waits WRITE_BATCH_DELAY seconds
+    Returns once it reads the None stop marker, after storing everything before it
+    """
+    loop = asyncio.get_running_loop()
+    
+    while True:
+        message = await _write_queue.get()
+        if message is None:
+            return
         
-        # Get attachments if any
-        attachments = data_message.get('attachments', [])
-        attachment_info = []
-        for att in attachments:
-            attachment_info.append({
-                'content_type': att.get('contentType', ''),
-                'filename': att.get('filename', ''),
-                'id': att.get('id', ''),
-                'size': att.get('size', 0)
-            })
+        batch = [message]
+        stopping = False
+        deadline = loop.time() + WRITE_BATCH_DELAY
         
-        # Store message in database
-        message_id = db.store_message(
-            sender_number=source_number,
-            sender_name=source_name,
-            timestamp=timestamp,
-            message_body=message_body,
-            attachments=json.dumps(attachment_info) if attachment_info else None,
-            raw_data=json.dumps(data),
-            group_id=group_id,
-            group_name=group_name
-        )
+        while len(batch) < WRITE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(_write_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if message is None:
+                stopping = True
+                break
+            batch.append(message)
         
-        if group_id:
-            logger.info(f"Stored group message {message_id} from {source_number} in group '{group_name}': {message_body[:50]}")
-        else:
-            # Update individual conversation
-            db.update_conversation(
-                contact_number=source_number,
-                contact_name=source_name,
-                last_message_at=datetime.fromtimestamp(timestamp / 1000)
-            )
-            logger.info(f"Stored message {message_id} from {source_number}: {message_body[:50]}")
+        try:
+            await run_db_write(db.store_messages, batch)
+        except Exception as e:
+            logger.error("Failed to store %d queued messages: %s", len(batch), e, exc_info=True)
         
-    except Exception as e:
-        logger.error(f"Error processing message: {e}", exc_info=True)
+        if stopping:
+            return
 
 
 # ============================================================================
@@ -166,21 +395,38 @@ async def process_incoming_message(data: dict):
 public_app = FastAPI(
     title="SignalController - Public Interface",
     description="Receives incoming Signal messages via SSE from signal-cli",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 
 @public_app.on_event("startup")
 async def startup_event():
     """Start background tasks on application startup"""
+    global _listener_task, _writer_task
     logger.info("Starting background SSE listener")
-    asyncio.create_task(listen_to_signal_events())
-
-
-class IncomingMessage(BaseModel):
-    """Model for incoming Signal messages from signal-cli webhook"""
-    envelope: dict
-    account: str
+    asyncio.create_task(refresh_health_timestamp())
+    _writer_task = asyncio.create_task(write_incoming_messages())
+    _listener_task = asyncio.create_task(listen_to_signal_events())
+
+
+@public_app.on_event("shutdown")
+async def shutdown_event():
+    """Store queued messages, then close the shared HTTP client and database connections"""
+    # Stop reading events first so nothing is queued behind the stop marker
+    if _listener_task is not None:
+        _listener_task.cancel()
+        await asyncio.gather(_listener_task, return_exceptions=True)
+    
+    # Messages signal-cli already delivered are only in the queue (or the
+    # writer's current batch); let the writer store them all before closing
+    if _writer_task is not None and not _writer_task.done():
+        await _write_queue.put(None)
+        await _writer_task
+    
+    await http_client.aclose()
+    db_writer.shutdown(wait=True)
+    db.close()
 
 
 @public_app.post("/webhook/signal")
@@ -188,44 +434,41 @@ async def receive_signal_message(request: Request):
     """
     Webhook endpoint for signal-cli to send incoming messages
     This endpoint is exposed to the internet via reverse proxy
+    If SIGNAL_WEBHOOK_SECRET is set, requests must carry a valid X-Signature
     """
+    body = await request.body()
+    
+    if config.WEBHOOK_SECRET_BYTES and not is_valid_webhook_signature(
+        body, request.headers.get("X-Signature")
+    ):
+        logger.warning("Invalid webhook signature from %s", request.client.host)
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    
     try:
-        data = await request.json()
-        logger.info(f"Received webhook data: {data}")
+        # Parse the body in one pass with orjson instead of Starlette's json
+        data = orjson.loads(body)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received webhook data: %s", data)
         
         # Parse the signal-cli webhook format
-        envelope = data.get('envelope', {})
-        
-        # Extract message data
-        source_number = envelope.get('sourceNumber', envelope.get('source', 'unknown'))
-        source_name = envelope.get('sourceName', envelope.get('sourceUuid', ''))
-        timestamp = envelope.get('timestamp', int(datetime.now().timestamp() * 1000))
-        
-        # Get message content
-        data_message = envelope.get('dataMessage', {})
-        message_body = data_message.get('message', '')
-        
-        # Get attachments if any
-        attachments = data_message.get('attachments', [])
-        attachment_info = []
-        for att in attachments:
-            attachment_info.append({
-                'content_type': att.get('contentType', ''),
-                'filename': att.get('filename', ''),
-                'id': att.get('id', ''),
-                'size': att.get('size', 0)
-            })
+        message = parse_envelope(data)
+        if message is None:
+            return {
+                "status": "ignored",
+                "message_id": None,
+                "timestamp": datetime.now().isoformat()
+            }
         
         # Store message in database
-        message_id = db.store_message(
-            sender_number=source_number,
-            sender_name=source_name,
-            timestamp=timestamp,
-            message_body=message_body,
-            attachments=attachment_info
-        )
+        message_id = await run_db_write(db.store_message, **message._asdict())
+        if message_id is None:
+            return {
+                "status": "duplicate",
+                "message_id": None,
+                "timestamp": datetime.now().isoformat()
+            }
         
-        logger.info(f"Stored message {message_id} from {source_number}")
+        logger.info("Stored message %s from %s", message_id, message.sender_number)
         
         return {
             "status": "success",
@@ -233,9 +476,14 @@ async def receive_signal_message(request: Request):
             "timestamp": datetime.now().isoformat()
         }
         
-    except Exception as e:
-        logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
+    except ValueError as e:
+        # Invalid JSON (orjson.JSONDecodeError is a ValueError) or an event
+        # parse_envelope can't read; the sender has to fix the request
+        logger.warning("Malformed webhook body from %s: %s", request.client.host, e)
+        return ORJSONResponse(status_code=400, content={"detail": f"Malformed message: {e}"})
+    except sqlite3.Error as e:
+        logger.error("Error processing webhook: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Error processing message: {e}"})
 
 
 @public_app.get("/health")
@@ -244,7 +492,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "SignalController-Public",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _health_timestamp
     }
 
 
@@ -255,32 +503,59 @@ async def health_check():
 private_app = FastAPI(
     title="SignalController - Private Interface",
     description="Internal API for sending Signal messages and querying stored messages",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Message listings are repetitive JSON and compress well; small replies are sent as-is
+private_app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+@private_app.on_event("startup")
+async def private_startup_event():
+    """Start background tasks on application startup"""
+    asyncio.create_task(refresh_health_timestamp())
+
+
+@private_app.on_event("shutdown")
+async def private_shutdown_event():
+    """Close the Signal client, store pending sent messages, then close the HTTP client and database"""
+    await signal_client.close()
+    # Sends that just completed are still being logged in the background;
+    # wait for them so delivered messages aren't missing from the database
+    if _background_tasks:
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+    await http_client.aclose()
+    db_writer.shutdown(wait=True)
+    db.close()
+
+
+# Private endpoints that skip the IP whitelist and API key checks
+PUBLIC_PATHS = frozenset({"/health"})
+
 
 @private_app.middleware("http")
 async def security_middleware(request: Request, call_next):
     """Middleware to check IP whitelist and API key for all private interface requests"""
-    client_ip = request.client.host
-    
     # Skip checks for health endpoint
-    if request.url.path == "/health":
+    if request.url.path in PUBLIC_PATHS:
         return await call_next(request)
     
+    client_ip = request.client.host
+    
     # Check IP whitelist
-    if client_ip not in config.PRIVATE_API_WHITELIST:
-        logger.warning(f"Unauthorized IP access attempt from {client_ip} to {request.url.path}")
-        return JSONResponse(
+    if not config.is_ip_whitelisted(client_ip):
+        logger.warning("Unauthorized IP access attempt from %s to %s", client_ip, request.url.path)
+        return ORJSONResponse(
             status_code=403,
             content={"detail": f"Access denied: IP {client_ip} not in whitelist"}
         )
     
     # Check API key
     api_key = request.headers.get("X-API-Key")
-    if api_key != config.API_KEY:
-        logger.warning(f"Invalid API key attempt from {client_ip}")
-        return JSONResponse(
+    if not is_valid_api_key(api_key):
+        logger.warning("Invalid API key attempt from %s", client_ip)
+        return ORJSONResponse(
             status_code=403,
             content={"detail": "Invalid API key"}
         )
@@ -290,7 +565,7 @@ async def security_middleware(request: Request, call_next):
 
 class SendMessageRequest(BaseModel):
     """Request model for sending messages"""
-    to: str = Field(..., description="Phone number or username to send to")
+    to: str = Field(..., description="Phone number, UUID, username or group ID to send to")
     message: str = Field(..., description="Message text to send")
     attachment: Optional[str] = Field(None, description="Path to attachment file (optional)")
 
@@ -303,6 +578,56 @@ class SendMessageResponse(BaseModel):
     message_preview: str
 
 
+# Recipient formats accepted by /send
+PHONE_NUMBER_PATTERN = re.compile(r'\+\d{7,15}')
+UUID_PATTERN = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+# Signal group IDs are base64 (44 chars for current groups)
+GROUP_ID_PATTERN = re.compile(r'[A-Za-z0-9+/]{20,}={0,2}')
+
+
+@lru_cache(maxsize=4096)
+def classify_recipient(to: str) -> Literal['phone', 'uuid', 'group', 'username']:
+    """Decide once what kind of Signal recipient a /send target is"""
+    if PHONE_NUMBER_PATTERN.fullmatch(to):
+        return 'phone'
+    if UUID_PATTERN.fullmatch(to):
+        return 'uuid'
+    if GROUP_ID_PATTERN.fullmatch(to):
+        return 'group'
+    return 'username'
+
+
+# Strong references to fire-and-forget tasks so they aren't garbage collected mid-run
+_background_tasks: set = set()
+
+
+async def store_sent_message(recipient: str, message: str, timestamp: int, is_group: bool):
+    """Persist a message sent through /send (failures are logged, not raised)"""
+    try:
+        group_id = recipient if is_group else None
+        
+        # Get group name from conversations if it exists
+        group_name = await run_db(db.get_group_name, group_id) if group_id else None
+        
+        # Store the sent message
+        message_id = await run_db_write(
+            db.store_message,
+            sender_number=config.SIGNAL_PHONE_NUMBER,
+            sender_name="Me",
+            timestamp=timestamp,
+            message_body=message,
+            attachments=None,
+            raw_data=None,
+            group_id=group_id,
+            group_name=group_name,
+            recipient_number=None if group_id else recipient
+        )
+        
+        logger.info("Stored sent message %s to %s", message_id, recipient)
+    except Exception as db_error:
+        logger.error("Failed to store sent message: %s", db_error, exc_info=True)
+
+
 @private_app.post("/send", response_model=SendMessageResponse)
 async def send_message(request_data: SendMessageRequest):
     """
@@ -310,97 +635,108 @@ async def send_message(request_data: SendMessageRequest):
     Requires valid API key in X-API-Key header and whitelisted IP
     """
     try:
-        logger.info(f"Sending message to {request_data.to}")
+        logger.info("Sending message to %s", request_data.to)
+        is_group = classify_recipient(request_data.to) == 'group'
         
-        # Send via signal-cli
-        result = await signal_client.send_message(
-            recipient=request_data.to,
-            message=request_data.message,
-            attachment=request_data.attachment
-        )
+        # Send via signal-cli (groups are addressed by groupId, not as a recipient)
+        if is_group:
+            result = await signal_client.send_group_message(
+                group_id=request_data.to,
+                message=request_data.message,
+                attachment=request_data.attachment
+            )
+        else:
+            result = await signal_client.send_message(
+                recipient=request_data.to,
+                message=request_data.message,
+                attachment=request_data.attachment
+            )
         
-        logger.info(f"Message sent successfully to {request_data.to}")
+        logger.info("Message sent successfully to %s", request_data.to)
         
-        # Store sent message in database
-        try:
-            timestamp = int(datetime.now().timestamp() * 1000)
-            
-            # Determine if this is a group message (group IDs are base64 strings with = padding)
-            is_group = '=' in request_data.to or len(request_data.to) > 20
-            group_id = request_data.to if is_group else None
-            
-            # Get group name from conversations if it exists
-            group_name = None
-            if is_group:
-                conversations = db.get_conversations()
-                for conv in conversations:
-                    if conv.get('group_id') == group_id:
-                        group_name = conv.get('contact_name')
-                        break
-            
-            # Store the sent message
-            message_id = db.store_message(
-                sender_number=config.SIGNAL_PHONE_NUMBER,
-                sender_name="Me",
-                timestamp=timestamp,
-                message_body=request_data.message,
-                attachments=None,
-                raw_data=None,
-                group_id=group_id,
-                group_name=group_name,
-                recipient_number=request_data.to if not is_group else None
-            )
-            
-            logger.info(f"Stored sent message {message_id} to {request_data.to}")
-        except Exception as db_error:
-            logger.error(f"Failed to store sent message: {db_error}", exc_info=True)
-            # Don't fail the request if database storage fails
+        # One clock read shared by the stored row and the response
+        timestamp = now_ms()
+        
+        # Store sent message in database without holding up the response
+        task = asyncio.create_task(store_sent_message(request_data.to, request_data.message, timestamp, is_group))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
         
         return SendMessageResponse(
             status="sent",
-            timestamp=datetime.now().isoformat(),
+            timestamp=datetime.fromtimestamp(timestamp / 1000).isoformat(),
             recipient=request_data.to,
             message_preview=request_data.message[:50] + "..." if len(request_data.message) > 50 else request_data.message
         )
         
-    except Exception as e:
-        logger.error(f"Error sending message: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
+    except (httpx.HTTPError, SignalAPIError) as e:
+        logger.error("Error sending message: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to send message: {e}"})
+
+
+# Bounds for listing parameters, enforced by FastAPI before a handler runs
+MAX_PAGE_SIZE = 1000
+MAX_OFFSET = 100_000
+
+
+def next_cursor(messages: list, limit: int) -> Optional[int]:
+    """Cursor (after_id) for the next page, or None when this was the last page"""
+    return messages[-1]['id'] if messages and len(messages) >= limit else None
+
+
+def warn_offset_deprecated(offset: int):
+    """Log use of the deprecated offset pagination parameter"""
+    if offset:
+        logger.warning("The offset parameter is deprecated, paginate with after_id instead")
 
 
 @private_app.get("/messages")
 async def get_messages(
-    limit: int = 100,
-    offset: int = 0,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_OFFSET),
     sender: Optional[str] = None,
     recipient: Optional[str] = None,
-    group_id: Optional[str] = None
+    group_id: Optional[str] = None,
+    after_id: Optional[int] = None,
+    include_raw_data: bool = False
 ):
     """
-    Retrieve stored messages from database
+    Retrieve stored messages from database, newest first
     Supports filtering by sender, recipient, or group_id
+    Paginate by passing the returned next_cursor as after_id
+    Raw signal-cli envelopes are omitted unless include_raw_data=true (or use /messages/{id})
     Requires valid API key in X-API-Key header and whitelisted IP
     Examples:
       /messages - Get all messages
+      /messages?after_id=1234 - Get the page following message 1234
       /messages?sender=+1234567890 - Get messages from specific sender
       /messages?recipient=+1234567890 - Get messages to specific recipient
       /messages?sender=+1234567890&recipient=+0987654321 - Get conversation between two numbers
       /messages?group_id=J60Zsn1Msd9SWoeMHvhbNroMRUV32H7BY5n/oOqNlUc= - Get group messages
     """
+    warn_offset_deprecated(offset)
     try:
         if group_id:
-            messages = db.get_group_messages(group_id, limit, offset)
+            messages = await run_db(
+                db.get_group_messages, group_id, limit, offset,
+                after_id=after_id, include_raw_data=include_raw_data
+            )
         else:
-            messages = db.get_messages(limit=limit, offset=offset, sender=sender, recipient=recipient)
+            messages = await run_db(
+                db.get_messages,
+                limit=limit, offset=offset, sender=sender, recipient=recipient,
+                after_id=after_id, include_raw_data=include_raw_data
+            )
         return {
             "count": len(messages),
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor(messages, limit),
             "messages": messages
         }
-    except Exception as e:
-        logger.error(f"Error retrieving messages: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve messages: {str(e)}")
+    except sqlite3.Error as e:
+        logger.error("Error retrieving messages: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve messages: {e}"})
 
 
 @private_app.get("/messages/{message_id}")
@@ -410,88 +746,100 @@ async def get_message(message_id: int):
     Requires valid API key in X-API-Key header and whitelisted IP
     """
     try:
-        message = db.get_message_by_id(message_id)
-        if not message:
-            raise HTTPException(status_code=404, detail="Message not found")
-        return message
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error retrieving message: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve message: {str(e)}")
+        message = await run_db(db.get_message_by_id, message_id)
+    except sqlite3.Error as e:
+        logger.error("Error retrieving message: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve message: {e}"})
+    
+    if not message:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return message
 
 
 @private_app.get("/conversations")
-async def get_conversations():
+async def get_conversations(response: Response, limit: Optional[int] = Query(None, ge=1)):
     """
-    Get all conversations with message counts
+    Get conversations with message counts, most recently active first
+    Pass limit to return only the N most recent conversations
     Requires valid API key in X-API-Key header and whitelisted IP
     """
     try:
-        conversations = db.get_conversations()
+        conversations = await cached_read(db.get_conversations, limit)
+        response.headers["Cache-Control"] = READ_CACHE_CONTROL
         return {
             "conversations": conversations,
             "count": len(conversations)
         }
-    except Exception as e:
-        logger.error(f"Error retrieving conversations: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve conversations: {str(e)}")
+    except sqlite3.Error as e:
+        logger.error("Error retrieving conversations: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve conversations: {e}"})
 
 
 @private_app.get("/groups")
-async def get_groups():
+async def get_groups(response: Response):
     """
     Get all group conversations
     Requires valid API key in X-API-Key header and whitelisted IP
     """
     try:
-        groups = db.get_group_conversations()
+        groups = await cached_read(db.get_group_conversations)
+        response.headers["Cache-Control"] = READ_CACHE_CONTROL
         return {
             "groups": groups,
             "count": len(groups)
         }
-    except Exception as e:
-        logger.error(f"Error retrieving groups: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve groups: {str(e)}")
+    except sqlite3.Error as e:
+        logger.error("Error retrieving groups: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve groups: {e}"})
 
 
 @private_app.get("/groups/{group_id}/messages")
 async def get_group_messages(
     group_id: str,
-    limit: int = 100,
-    offset: int = 0
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0, le=MAX_OFFSET),
+    after_id: Optional[int] = None,
+    include_raw_data: bool = False
 ):
     """
-    Get messages from a specific group
+    Get messages from a specific group, newest first
+    Paginate by passing the returned next_cursor as after_id
+    Raw signal-cli envelopes are omitted unless include_raw_data=true (or use /messages/{id})
     Requires valid API key in X-API-Key header and whitelisted IP
     Note: group_id must be URL-encoded
     """
+    warn_offset_deprecated(offset)
     try:
-        messages = db.get_group_messages(group_id, limit, offset)
+        messages = await run_db(
+            db.get_group_messages, group_id, limit, offset,
+            after_id=after_id, include_raw_data=include_raw_data
+        )
         return {
             "group_id": group_id,
             "count": len(messages),
             "limit": limit,
             "offset": offset,
+            "next_cursor": next_cursor(messages, limit),
             "messages": messages
         }
-    except Exception as e:
-        logger.error(f"Error retrieving group messages: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve group messages: {str(e)}")
+    except sqlite3.Error as e:
+        logger.error("Error retrieving group messages: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve group messages: {e}"})
 
 
 @private_app.get("/stats")
-async def get_stats():
+async def get_stats(response: Response):
     """
     Get message statistics
     Requires valid API key in X-API-Key header and whitelisted IP
     """
     try:
-        stats = db.get_statistics()
+        stats = await cached_read(db.get_statistics)
+        response.headers["Cache-Control"] = READ_CACHE_CONTROL
         return stats
-    except Exception as e:
-        logger.error(f"Error retrieving stats: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Failed to retrieve statistics: {str(e)}")
+    except sqlite3.Error as e:
+        logger.error("Error retrieving stats: %s", e)
+        return ORJSONResponse(status_code=500, content={"detail": f"Failed to retrieve statistics: {e}"})
 
 
 @private_app.get("/health")
@@ -500,7 +848,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "SignalController-Private",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _health_timestamp
     }
 
 
@@ -509,9 +857,6 @@ async def health_check():
 # ============================================================================
 
 if __name__ == "__main__":
-    import sys
-    import os
-    
     if len(sys.argv) < 2:
         print("Usage: python main.py [public|private]")
         sys.exit(1)
@@ -525,7 +870,9 @@ if __name__ == "__main__":
             public_app,
             host="0.0.0.0",
             port=8888,
-            log_level="info"
+            log_level="info",
+            loop="uvloop",
+            http="httptools"
         )
     elif interface == "private":
         logger.info(f"Starting private interface on port 9000 (IP whitelist: {config.PRIVATE_API_WHITELIST})")
@@ -533,7 +880,9 @@ if __name__ == "__main__":
             private_app,
             host="0.0.0.0",  # Bind to all interfaces, IP whitelist in middleware
             port=9000,
-            log_level="info"
+            log_level="info",
+            loop="uvloop",
+            http="httptools"
         )
     else:
         print(f"Unknown interface: {interface}")
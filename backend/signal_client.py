@@ -3,19 +3,150 @@ Signal CLI client wrapper
 Handles communication with signal-cli REST API
 """
 
+import asyncio
+import itertools
 import httpx
 import logging
-from typing import Optional, List
+from typing import Optional, List, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Connection pool settings for talking to signal-cli; idle connections are
+# kept alive so consecutive sends skip the TCP handshake
+CONNECTION_LIMITS = httpx.Limits(
+    max_keepalive_connections=32,
+    max_connections=64,
+    keepalive_expiry=60.0
+)
+
+# Maximum number of queued sends merged into one JSON-RPC batch request;
+# signal-cli runs a batch's sends one after another, so keep it small
+RPC_BATCH_SIZE = 8
+
+
+class SignalAPIError(Exception):
+    """signal-cli answered a JSON-RPC call with an error"""
+
+
+def _decode_response(response: httpx.Response):
+    """Decode a JSON-RPC reply, raising SignalAPIError if it isn't JSON"""
+    try:
+        return response.json()
+    except ValueError as e:
+        raise SignalAPIError(f"Signal API error: invalid JSON response: {e}") from e
+
+
+def _error_message(error) -> str:
+    """Message of a JSON-RPC error member, which should be an object but may not be"""
+    if isinstance(error, dict):
+        return str(error.get("message", "Unknown error"))
+    return str(error)
+
 
 class SignalClient:
     """Client for interacting with signal-cli REST API"""
     
-    def __init__(self, base_url: str = "http://localhost:8080"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        client: Optional[httpx.AsyncClient] = None,
+        timeout: float = 30.0
+    ):
+        """
+        Args:
+            base_url: signal-cli HTTP endpoint
+            client: Shared HTTP client to use instead of creating a new one
+            timeout: Timeout in seconds for each RPC call (a batch gets this per call)
+        """
         self.base_url = base_url.rstrip('/')
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self.rpc_url = f"{self.base_url}/api/v1/rpc"
+        self.timeout_seconds = timeout
+        self.timeout = httpx.Timeout(timeout, connect=5.0)
+        self._owns_client = client is None
+        if client is None:
+            client = httpx.AsyncClient(timeout=self.timeout, limits=CONNECTION_LIMITS)
+        self.client = client
+        self._rpc_ids = itertools.count(1)
+        self._rpc_queue: "asyncio.Queue[Tuple[dict, asyncio.Future]]" = asyncio.Queue()
+        self._batcher_task: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+    
+    async def _call(self, method: str, params: dict):
+        """
+        Queue a JSON-RPC call and wait for its result
+        
+        Calls made concurrently are sent to signal-cli in batch requests of up to RPC_BATCH_SIZE.
+        """
+        if self._batcher_task is None or self._batcher_task.done():
+            self._batcher_task = asyncio.create_task(self._batcher())
+        
+        payload = {
+            "jsonrpc": "2.0",
+            "method": method,
+            "params": params,
+            "id": next(self._rpc_ids)
+        }
+        future = asyncio.get_running_loop().create_future()
+        await self._rpc_queue.put((payload, future))
+        return await future
+    
+    async def _batcher(self):
+        """Drain queued calls into batches, each posted to signal-cli by its own task"""
+        while True:
+            batch = [await self._rpc_queue.get()]
+            while len(batch) < RPC_BATCH_SIZE and not self._rpc_queue.empty():
+                batch.append(self._rpc_queue.get_nowait())
+            
+            # Don't wait for the response: further batches go out in parallel
+            # over the connection pool while this one is in flight
+            task = asyncio.create_task(self._send_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _send_batch(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Post a batch, failing every caller still waiting if the request fails"""
+        try:
+            await self._post_batch(batch)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+    
+    async def _post_batch(self, batch: List[Tuple[dict, asyncio.Future]]):
+        """Send a batch of JSON-RPC requests and resolve each caller's future by id"""
+        payloads = [payload for payload, _ in batch]
+        body = payloads[0] if len(payloads) == 1 else payloads
+        
+        # signal-cli handles the calls in turn, so allow each its own timeout
+        timeout = httpx.Timeout(self.timeout_seconds * len(batch), connect=5.0)
+        response = await self.client.post(self.rpc_url, json=body, timeout=timeout)
+        response.raise_for_status()
+        results = _decode_response(response)
+        if isinstance(results, dict):
+            results = [results]
+        if not isinstance(results, list):
+            raise SignalAPIError("Signal API error: unexpected response")
+        
+        # Elements that aren't objects (or carry an unusable id) match no
+        # request, so their callers get the "no response" error below
+        results_by_id = {}
+        for result in results:
+            if isinstance(result, dict) and isinstance(result.get("id"), int):
+                results_by_id[result["id"]] = result
+        
+        for payload, future in batch:
+            if future.done():
+                continue
+            
+            result = results_by_id.get(payload["id"])
+            if result is None:
+                future.set_exception(SignalAPIError("Signal API error: no response for request"))
+            elif "error" in result:
+                error_msg = _error_message(result["error"])
+                logger.error("JSON-RPC error: %s", error_msg)
+                future.set_exception(SignalAPIError(f"Signal API error: {error_msg}"))
+            else:
+                future.set_result(result.get("result", {}))
         
     async def send_message(
         self,
@@ -34,40 +165,20 @@ class SignalClient:
         Returns:
             Response from signal-cli
         """
-        endpoint = f"{self.base_url}/api/v1/rpc"
-        
-        # Build JSON-RPC request
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "send",
-            "params": {
-                "recipient": [recipient],
-                "message": message
-            },
-            "id": 1
+        params = {
+            "recipient": [recipient],
+            "message": message
         }
         
         # Add attachment if provided
         if attachment:
-            payload["params"]["attachments"] = [attachment]
-        
-        response = await self.client.post(
-            endpoint,
-            json=payload
-        )
+            params["attachments"] = [attachment]
         
-        response.raise_for_status()
-        result = response.json()
-        
-        # Check for JSON-RPC error
-        if "error" in result:
-            error_msg = result["error"].get("message", "Unknown error")
-            logger.error(f"JSON-RPC error: {error_msg}")
-            raise Exception(f"Signal API error: {error_msg}")
+        result = await self._call("send", params)
         
-        logger.info(f"Message sent to {recipient}: {result.get('result', {})}")
+        logger.info("Message sent to %s: %s", recipient, result)
         
-        return result.get("result", {})
+        return result
     
     async def send_group_message(
         self,
@@ -86,43 +197,19 @@ class SignalClient:
         Returns:
             Response from signal-cli
         """
-        endpoint = f"{self.base_url}/api/v1/rpc"
-        
-        # Build JSON-RPC request
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "send",
-            "params": {
-                "groupId": group_id,
-                "message": message
-            },
-            "id": 2
+        params = {
+            "groupId": group_id,
+            "message": message
         }
         
         # Add attachment if provided
         if attachment:
-            payload["params"]["attachments"] = [attachment]
-        
-        response = await self.client.post(
-            endpoint,
-            json=payload
-        )
+            params["attachments"] = [attachment]
         
-        response.raise_for_status()
-        result = response.json()
-        
-        # Check for JSON-RPC error
-        if "error" in result:
-            error_msg = result["error"].get("message", "Unknown error")
-            logger.error(f"JSON-RPC error: {error_msg}")
-            raise Exception(f"Signal API error: {error_msg}")
-        
-        return result.get("result", {})
+        return await self._call("send", params)
     
     async def get_registered_numbers(self) -> List[str]:
         """Get list of registered phone numbers in signal-cli via JSON-RPC"""
-        endpoint = f"{self.base_url}/api/v1/rpc"
-        
         payload = {
             "jsonrpc": "2.0",
             "method": "listAccounts",
@@ -130,19 +217,36 @@ class SignalClient:
             "id": 3
         }
         
-        response = await self.client.post(endpoint, json=payload)
+        response = await self.client.post(self.rpc_url, json=payload, timeout=self.timeout)
         response.raise_for_status()
         
-        result = response.json()
+        result = _decode_response(response)
+        if not isinstance(result, dict):
+            raise SignalAPIError("Signal API error: unexpected response")
         
         # Check for JSON-RPC error
         if "error" in result:
-            error_msg = result["error"].get("message", "Unknown error")
-            logger.error(f"JSON-RPC error: {error_msg}")
-            raise Exception(f"Signal API error: {error_msg}")
+            error_msg = _error_message(result["error"])
+            logger.error("JSON-RPC error: %s", error_msg)
+            raise SignalAPIError(f"Signal API error: {error_msg}")
         
         return result.get("result", [])
     
     async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
+        """Stop the batcher and close the HTTP client (unless it was passed in by the caller)"""
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+        
+        # Calls that never made it into a batch won't be sent
+        while not self._rpc_queue.empty():
+            _, future = self._rpc_queue.get_nowait()
+            if not future.done():
+                future.set_exception(SignalAPIError("Signal client closed before the request was sent"))
+        
+        # Batches already posted may have been delivered, so let them finish
+        # (each is bounded by its timeout) and resolve their callers
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        
+        if self._owns_client:
+            await self.client.aclose()
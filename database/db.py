@@ -4,14 +4,175 @@ Handles message storage and retrieval using SQLite
 """
 
 import sqlite3
-import json
 import logging
+import threading
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from pathlib import Path
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# Messages already stored under the same envelope_uid (a replayed event) are
+# skipped; the conversations trigger only fires for rows actually inserted
+INSERT_MESSAGE_SQL = '''
+    INSERT INTO messages (
+        sender_number, sender_name, recipient_number, timestamp, message_body,
+        attachments, raw_data, group_id, group_name, envelope_uid
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(envelope_uid) DO NOTHING
+'''
+
+# RETURNING yields no row for a skipped duplicate, so the caller knows nothing was added
+INSERT_MESSAGE_RETURNING_SQL = INSERT_MESSAGE_SQL + '    RETURNING id\n'
+
+# Messages are listed by (timestamp, id) descending; this seeks to the rows
+# after a cursor message using the index instead of skipping OFFSET rows
+KEYSET_CONDITION = '(timestamp, id) < (SELECT timestamp, id FROM messages WHERE id = ?)'
+
+# Columns returned by message listings; the (large) raw_data envelope is only
+# read when a caller asks for it
+MESSAGE_LIST_COLUMNS = (
+    'id, sender_number, sender_name, recipient_number, timestamp, received_at, '
+    'message_body, attachments, processed, group_id, group_name'
+)
+
+
+def _message_list_columns(include_raw_data: bool) -> str:
+    """SELECT list for message listings"""
+    return f'{MESSAGE_LIST_COLUMNS}, raw_data' if include_raw_data else MESSAGE_LIST_COLUMNS
+
+
+# Memory-map up to this many bytes of the database file for reads
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Page cache per connection, in KiB (negative cache_size means KiB, not pages)
+CACHE_SIZE_KIB = 20000
+
+# Prepared statements kept per connection; the filter combinations of
+# get_messages produce several distinct query strings
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds a connection waits on another's write lock before raising
+# "database is locked" (the writer thread and migrations can overlap)
+BUSY_TIMEOUT = 5.0
+
+# Schema, applied in one executescript call; every statement is idempotent
+SCHEMA_SQL = '''
+-- Write-ahead logging lets readers run alongside the writer;
+-- the journal mode is persistent so it only has to be set once
+PRAGMA journal_mode=WAL;
+
+-- Messages table
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sender_number TEXT NOT NULL,
+    sender_name TEXT,
+    recipient_number TEXT,
+    timestamp INTEGER NOT NULL,
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    message_body TEXT,
+    attachments TEXT,
+    raw_data TEXT,
+    processed BOOLEAN DEFAULT 0,
+    group_id TEXT,
+    group_name TEXT,
+    envelope_uid TEXT
+);
+
+-- Identifies a received signal-cli event so replays aren't stored twice;
+-- sent messages leave it NULL, which never conflicts
+CREATE UNIQUE INDEX IF NOT EXISTS idx_envelope_uid ON messages(envelope_uid);
+
+-- (sender_number, timestamp) serves both the filter and the newest-first
+-- order of get_messages(sender=...); it replaces the old idx_sender
+DROP INDEX IF EXISTS idx_sender;
+CREATE INDEX IF NOT EXISTS idx_sender_timestamp ON messages(sender_number, timestamp);
+
+CREATE INDEX IF NOT EXISTS idx_timestamp ON messages(timestamp);
+CREATE INDEX IF NOT EXISTS idx_received ON messages(received_at);
+
+-- (group_id, timestamp) serves get_group_messages' filter and order
+-- and any group_id lookup, so the old single-column index is dropped
+DROP INDEX IF EXISTS idx_group_id;
+CREATE INDEX IF NOT EXISTS idx_group_timestamp ON messages(group_id, timestamp);
+
+DROP INDEX IF EXISTS idx_recipient;
+CREATE INDEX IF NOT EXISTS idx_recipient_timestamp ON messages(recipient_number, timestamp);
+
+-- Conversations table (aggregate view)
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    contact_number TEXT UNIQUE NOT NULL,
+    contact_name TEXT,
+    last_message_at TIMESTAMP,
+    message_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    is_group BOOLEAN DEFAULT 0,
+    group_id TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_group_id ON conversations(group_id);
+
+-- Keep the conversation aggregate in step with every inserted message,
+-- so the write path is a single INSERT statement
+-- For groups, group_id is used as the contact_number identifier
+CREATE TRIGGER IF NOT EXISTS trg_msg_conv
+AFTER INSERT ON messages
+BEGIN
+    INSERT INTO conversations (contact_number, contact_name, last_message_at, message_count, is_group, group_id)
+    VALUES (
+        COALESCE(NULLIF(NEW.group_id, ''), NEW.sender_number),
+        COALESCE(NULLIF(NEW.group_name, ''), NEW.sender_name),
+        CURRENT_TIMESTAMP,
+        1,
+        COALESCE(NEW.group_id, '') != '',
+        NEW.group_id
+    )
+    ON CONFLICT(contact_number) DO UPDATE SET
+        contact_name = excluded.contact_name,
+        last_message_at = CURRENT_TIMESTAMP,
+        message_count = message_count + 1,
+        is_group = excluded.is_group,
+        group_id = excluded.group_id;
+END;
+
+-- Sent messages log (optional)
+CREATE TABLE IF NOT EXISTS sent_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    recipient TEXT NOT NULL,
+    message_body TEXT,
+    attachment_path TEXT,
+    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    status TEXT DEFAULT 'sent',
+    error_message TEXT
+);
+'''
+
+
+def _to_json(value: Any) -> Optional[str]:
+    """Serialize a value for a JSON column, passing already-encoded JSON through"""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, str):
+        return value
+    return orjson.dumps(value).decode('utf-8')
+
+
+def _tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning plain tuples instead of sqlite3.Row (callers unpack or zip them)"""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _column_names(cursor: sqlite3.Cursor) -> List[str]:
+    """Column names of the cursor's current result set"""
+    return [column[0] for column in cursor.description]
+
 
 class Database:
     """SQLite database handler for Signal messages"""
@@ -19,6 +180,15 @@ class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
         
+        # Bumped on every write made through this instance, so callers can
+        # tell whether a cached read is still current
+        self.version = 0
+        
+        # One long-lived connection per thread (run_db uses a thread pool)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        
         # Ensure parent directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
@@ -26,89 +196,62 @@ class Database:
         self._init_database()
         
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a database connection"""
-        conn = sqlite3.connect(self.db_path)
+        """Get this thread's database connection, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            timeout=BUSY_TIMEOUT,
+            # Write transactions take the write lock at BEGIN, so a conflict
+            # waits on the busy timeout up front rather than failing mid-way
+            isolation_level='IMMEDIATE'
+        )
         conn.row_factory = sqlite3.Row  # Enable column access by name
+        # WAL (set in _init_database) only needs an fsync at checkpoints
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KIB}')
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        
+        self._local.conn = conn
+        with self._connections_lock:
+            self._connections.append(conn)
         return conn
     
+    def close(self):
+        """Close every connection opened by this Database"""
+        with self._connections_lock:
+            for conn in self._connections:
+                # Refresh query planner statistics for the queries this connection ran
+                try:
+                    conn.execute('PRAGMA optimize')
+                except sqlite3.Error as e:
+                    logger.warning("PRAGMA optimize failed: %s", e)
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
     def _init_database(self):
         """Initialize database schema"""
         conn = self._get_connection()
-        cursor = conn.cursor()
         
-        # Messages table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                sender_number TEXT NOT NULL,
-                sender_name TEXT,
-                recipient_number TEXT,
-                timestamp INTEGER NOT NULL,
-                received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                message_body TEXT,
-                attachments TEXT,
-                raw_data TEXT,
-                processed BOOLEAN DEFAULT 0,
-                group_id TEXT,
-                group_name TEXT
-            )
-        ''')
+        # Databases created before envelope_uid existed get the column added
+        # (a missing table reports no columns and is created with it below)
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(messages)')}
+        if columns and 'envelope_uid' not in columns:
+            conn.execute('ALTER TABLE messages ADD COLUMN envelope_uid TEXT')
+            conn.commit()
         
-        # Create indexes for messages table
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_sender 
-            ON messages(sender_number)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_timestamp 
-            ON messages(timestamp)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_received 
-            ON messages(received_at)
-        ''')
-        
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_group_id 
-            ON messages(group_id)
-        ''')
+        conn.executescript(SCHEMA_SQL)
         
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_recipient 
-            ON messages(recipient_number)
-        ''')
-        
-        # Conversations table (aggregate view)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                contact_number TEXT UNIQUE NOT NULL,
-                contact_name TEXT,
-                last_message_at TIMESTAMP,
-                message_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_group BOOLEAN DEFAULT 0,
-                group_id TEXT
-            )
-        ''')
-        
-        # Sent messages log (optional)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sent_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                recipient TEXT NOT NULL,
-                message_body TEXT,
-                attachment_path TEXT,
-                sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                status TEXT DEFAULT 'sent',
-                error_message TEXT
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        # Connections are long-lived, so refresh statistics at open too; plain
+        # optimize only covers tables this connection has queried, so 0x10000
+        # makes it check every table (SQLite's recommended form when opening)
+        conn.execute('PRAGMA optimize=0x10002')
         
         logger.info(f"Database initialized at {self.db_path}")
     
@@ -119,11 +262,12 @@ class Database:
         timestamp: int,
         message_body: str,
         attachments: List[Dict] = None,
-        raw_data: Dict = None,
+        raw_data: Union[Dict, bytes, str] = None,
         group_id: str = None,
         group_name: str = None,
-        recipient_number: str = None
-    ) -> int:
+        recipient_number: str = None,
+        envelope_uid: str = None
+    ) -> Optional[int]:
         """
         Store an incoming or outgoing message
         
@@ -133,127 +277,155 @@ class Database:
             timestamp: Message timestamp (milliseconds)
             message_body: Message text
             attachments: List of attachment metadata
-            raw_data: Raw envelope data from signal-cli
+            raw_data: Raw envelope data from signal-cli (dict or already-encoded JSON)
             group_id: Group ID if message is from a group
             group_name: Group name if message is from a group
             recipient_number: Phone number of recipient (for sent messages)
+            envelope_uid: Unique key of the received event, used to skip duplicates (optional)
             
         Returns:
-            Message ID
+            Message ID, or None if a message with the same envelope_uid already exists
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Convert attachments and raw_data to JSON strings
-        attachments_json = json.dumps(attachments) if attachments else None
-        raw_data_json = json.dumps(raw_data) if raw_data else None
-        
-        cursor.execute('''
-            INSERT INTO messages (
-                sender_number, sender_name, recipient_number, timestamp, message_body,
-                attachments, raw_data, group_id, group_name
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            sender_number,
-            sender_name,
-            recipient_number,
-            timestamp,
-            message_body,
-            attachments_json,
-            raw_data_json,
-            group_id,
-            group_name
-        ))
-        
-        message_id = cursor.lastrowid
-        
-        # Update or create conversation entry
-        # For groups, use group_id as the contact_number identifier
-        conversation_id = group_id if group_id else sender_number
-        conversation_name = group_name if group_name else sender_name
-        is_group = 1 if group_id else 0
+        # Commits on success, rolls back if a statement fails
+        with conn:
+            cursor = conn.cursor()
+            
+            # Convert attachments and raw_data to JSON strings
+            attachments_json = _to_json(attachments)
+            raw_data_json = _to_json(raw_data)
+            
+            cursor.execute(INSERT_MESSAGE_RETURNING_SQL, (
+                sender_number,
+                sender_name,
+                recipient_number,
+                timestamp,
+                message_body,
+                attachments_json,
+                raw_data_json,
+                group_id,
+                group_name,
+                envelope_uid
+            ))
+            
+            row = cursor.fetchone()
+            if row is None:
+                logger.debug("Skipped duplicate message %s", envelope_uid)
+                return None
+            message_id = row[0]
         
-        cursor.execute('''
-            INSERT INTO conversations (contact_number, contact_name, last_message_at, message_count, is_group, group_id)
-            VALUES (?, ?, CURRENT_TIMESTAMP, 1, ?, ?)
-            ON CONFLICT(contact_number) DO UPDATE SET
-                contact_name = excluded.contact_name,
-                last_message_at = CURRENT_TIMESTAMP,
-                message_count = message_count + 1,
-                is_group = excluded.is_group,
-                group_id = excluded.group_id
-        ''', (conversation_id, conversation_name, is_group, group_id))
-        
-        conn.commit()
-        conn.close()
+        self.version += 1
         
         if group_id:
-            logger.info(f"Stored group message {message_id} from {sender_number} in group {group_name}")
+            logger.info("Stored group message %s from %s in group %s", message_id, sender_number, group_name)
         else:
-            logger.info(f"Stored message {message_id} from {sender_number}")
+            logger.info("Stored message %s from %s", message_id, sender_number)
         return message_id
     
+    def store_messages(self, messages: List[Dict[str, Any]]) -> int:
+        """
+        Store a batch of messages in a single transaction
+        
+        Args:
+            messages: List of dicts with the same keys as the store_message arguments
+            
+        Returns:
+            Number of messages stored (duplicates by envelope_uid are skipped)
+        """
+        if not messages:
+            return 0
+        
+        message_rows = [
+            (
+                message['sender_number'],
+                message.get('sender_name'),
+                message.get('recipient_number'),
+                message['timestamp'],
+                message.get('message_body'),
+                _to_json(message.get('attachments')),
+                _to_json(message.get('raw_data')),
+                message.get('group_id'),
+                message.get('group_name'),
+                message.get('envelope_uid')
+            )
+            for message in messages
+        ]
+        
+        conn = self._get_connection()
+        # Commits on success, rolls back if a statement fails
+        with conn:
+            # One prepared statement and one commit for the whole batch; the
+            # trigger updates conversations, and rowcount leaves out both its
+            # writes and skipped duplicates
+            stored = conn.executemany(INSERT_MESSAGE_SQL, message_rows).rowcount
+        
+        self.version += 1
+        
+        skipped = len(message_rows) - stored
+        if skipped:
+            logger.info("Stored batch of %d messages (%d duplicates skipped)", stored, skipped)
+        else:
+            logger.info("Stored batch of %d messages", stored)
+        return stored
+    
     def get_messages(
         self,
         limit: int = 100,
         offset: int = 0,
         sender: Optional[str] = None,
-        recipient: Optional[str] = None
+        recipient: Optional[str] = None,
+        after_id: Optional[int] = None,
+        include_raw_data: bool = True
     ) -> List[Dict[str, Any]]:
         """
-        Retrieve messages from database
+        Retrieve messages from database, newest first
         
         Args:
             limit: Maximum number of messages to return
-            offset: Number of messages to skip
+            offset: Number of messages to skip (deprecated, use after_id)
             sender: Filter by sender number (optional)
             recipient: Filter by recipient number (optional)
+            after_id: Only return messages listed after this message ID (optional)
+            include_raw_data: Also return the raw signal-cli envelope of each message
             
         Returns:
             List of message dictionaries
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        if sender and recipient:
-            cursor.execute('''
-                SELECT * FROM messages
-                WHERE sender_number = ? AND recipient_number = ?
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
-            ''', (sender, recipient, limit, offset))
-        elif sender:
-            cursor.execute('''
-                SELECT * FROM messages
-                WHERE sender_number = ?
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
-            ''', (sender, limit, offset))
-        elif recipient:
-            cursor.execute('''
-                SELECT * FROM messages
-                WHERE recipient_number = ?
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
-            ''', (recipient, limit, offset))
-        else:
-            cursor.execute('''
-                SELECT * FROM messages
-                ORDER BY timestamp DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        cursor = _tuple_cursor(conn)
+        
+        conditions = []
+        params = []
+        if sender:
+            conditions.append('sender_number = ?')
+            params.append(sender)
+        if recipient:
+            conditions.append('recipient_number = ?')
+            params.append(recipient)
+        if after_id is not None:
+            # Keyset pagination: seek past the cursor row instead of counting OFFSET rows
+            conditions.append(KEYSET_CONDITION)
+            params.append(after_id)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        cursor.execute(f'''
+            SELECT {_message_list_columns(include_raw_data)} FROM messages
+            {where}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ? OFFSET ?
+        ''', (*params, limit, offset))
         
+        # Decode rows straight off the cursor instead of buffering them with fetchall();
+        # zipping plain tuples with the column names is cheaper than sqlite3.Row
+        columns = _column_names(cursor)
         messages = []
-        for row in rows:
-            message = dict(row)
+        for row in cursor:
+            message = dict(zip(columns, row))
             # Parse JSON fields
             if message['attachments']:
-                message['attachments'] = json.loads(message['attachments'])
-            if message['raw_data']:
-                message['raw_data'] = json.loads(message['raw_data'])
+                message['attachments'] = orjson.loads(message['attachments'])
+            if message.get('raw_data'):
+                message['raw_data'] = orjson.loads(message['raw_data'])
             messages.append(message)
         
         return messages
@@ -271,77 +443,125 @@ class Database:
         conn = self._get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM messages WHERE id = ?', (message_id,))
+        # Same columns as the listings plus raw_data; the internal envelope_uid
+        # dedupe key isn't part of the API
+        cursor.execute(
+            f'SELECT {_message_list_columns(include_raw_data=True)} FROM messages WHERE id = ?',
+            (message_id,)
+        )
         row = cursor.fetchone()
-        conn.close()
         
         if not row:
             return None
         
         message = dict(row)
         if message['attachments']:
-            message['attachments'] = json.loads(message['attachments'])
+            message['attachments'] = orjson.loads(message['attachments'])
         if message['raw_data']:
-            message['raw_data'] = json.loads(message['raw_data'])
+            message['raw_data'] = orjson.loads(message['raw_data'])
         
         return message
     
-    def get_conversations(self) -> List[Dict[str, Any]]:
+    def get_conversations(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Get all conversations with message counts
+        Get conversations with message counts, most recently active first
         
+        Args:
+            limit: Maximum number of conversations (optional, default all)
+            
         Returns:
             List of conversation dictionaries
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = _tuple_cursor(conn)
         
+        # LIMIT -1 means no limit in SQLite
         cursor.execute('''
             SELECT * FROM conversations
             ORDER BY last_message_at DESC
-        ''')
-        
-        rows = cursor.fetchall()
-        conn.close()
+            LIMIT ?
+        ''', (limit if limit is not None else -1,))
         
-        return [dict(row) for row in rows]
+        columns = _column_names(cursor)
+        return [dict(zip(columns, row)) for row in cursor]
     
-    def get_group_messages(self, group_id: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_group_messages(
+        self,
+        group_id: str,
+        limit: int = 100,
+        offset: int = 0,
+        after_id: Optional[int] = None,
+        include_raw_data: bool = True
+    ) -> List[Dict[str, Any]]:
         """
-        Get messages from a specific group
+        Get messages from a specific group, newest first
         
         Args:
             group_id: Group ID
             limit: Maximum number of messages
-            offset: Number of messages to skip
+            offset: Number of messages to skip (deprecated, use after_id)
+            after_id: Only return messages listed after this message ID (optional)
+            include_raw_data: Also return the raw signal-cli envelope of each message
             
         Returns:
             List of message dictionaries
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM messages
-            WHERE group_id = ?
-            ORDER BY timestamp DESC
-            LIMIT ? OFFSET ?
-        ''', (group_id, limit, offset))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        cursor = _tuple_cursor(conn)
+        
+        select_list = _message_list_columns(include_raw_data)
+        if after_id is not None:
+            cursor.execute(f'''
+                SELECT {select_list} FROM messages
+                WHERE group_id = ? AND {KEYSET_CONDITION}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (group_id, after_id, limit, offset))
+        else:
+            cursor.execute(f'''
+                SELECT {select_list} FROM messages
+                WHERE group_id = ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ? OFFSET ?
+            ''', (group_id, limit, offset))
         
+        # Decode rows straight off the cursor instead of buffering them with fetchall();
+        # zipping plain tuples with the column names is cheaper than sqlite3.Row
+        columns = _column_names(cursor)
         messages = []
-        for row in rows:
-            message = dict(row)
+        for row in cursor:
+            message = dict(zip(columns, row))
             if message['attachments']:
-                message['attachments'] = json.loads(message['attachments'])
-            if message['raw_data']:
-                message['raw_data'] = json.loads(message['raw_data'])
+                message['attachments'] = orjson.loads(message['attachments'])
+            if message.get('raw_data'):
+                message['raw_data'] = orjson.loads(message['raw_data'])
             messages.append(message)
         
         return messages
     
+    def get_group_name(self, group_id: str) -> Optional[str]:
+        """
+        Look up the stored name of a group
+        
+        Args:
+            group_id: Group ID
+            
+        Returns:
+            Group name or None if the group is unknown
+        """
+        conn = self._get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT contact_name FROM conversations
+            WHERE group_id = ?
+            LIMIT 1
+        ''', (group_id,))
+        
+        row = cursor.fetchone()
+        
+        return row['contact_name'] if row else None
+    
     def get_group_conversations(self) -> List[Dict[str, Any]]:
         """
         Get all group conversations
@@ -350,7 +570,7 @@ class Database:
             List of group conversation dictionaries
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = _tuple_cursor(conn)
         
         cursor.execute('''
             SELECT * FROM conversations
@@ -358,10 +578,8 @@ class Database:
             ORDER BY last_message_at DESC
         ''')
         
-        rows = cursor.fetchall()
-        conn.close()
-        
-        return [dict(row) for row in rows]
+        columns = _column_names(cursor)
+        return [dict(zip(columns, row)) for row in cursor]
     
     def update_conversation(
         self,
@@ -378,21 +596,22 @@ class Database:
             last_message_at: Timestamp of last message (optional)
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Note: This is also handled automatically in store_message,
-        # but this method provides explicit control
-        cursor.execute('''
-            INSERT INTO conversations (contact_number, contact_name, last_message_at, message_count)
-            VALUES (?, ?, ?, 1)
-            ON CONFLICT(contact_number) DO UPDATE SET
-                contact_name = COALESCE(excluded.contact_name, contact_name),
-                last_message_at = COALESCE(excluded.last_message_at, last_message_at),
-                message_count = message_count + 1
-        ''', (contact_number, contact_name, last_message_at))
-        
-        conn.commit()
-        conn.close()
+        # Commits on success, rolls back if a statement fails
+        with conn:
+            cursor = conn.cursor()
+            
+            # Note: This is also handled automatically in store_message,
+            # but this method provides explicit control
+            cursor.execute('''
+                INSERT INTO conversations (contact_number, contact_name, last_message_at, message_count)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(contact_number) DO UPDATE SET
+                    contact_name = COALESCE(excluded.contact_name, contact_name),
+                    last_message_at = COALESCE(excluded.last_message_at, last_message_at),
+                    message_count = message_count + 1
+            ''', (contact_number, contact_name, last_message_at))
+        
+        self.version += 1
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -402,22 +621,21 @@ class Database:
             Dictionary with statistics
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
+        # Plain tuples: the counts are unpacked directly, so no Row objects
+        cursor = _tuple_cursor(conn)
         
         # Total messages
-        cursor.execute('SELECT COUNT(*) as count FROM messages')
-        total_messages = cursor.fetchone()['count']
+        (total_messages,) = cursor.execute('SELECT COUNT(*) FROM messages').fetchone()
         
         # Total conversations
-        cursor.execute('SELECT COUNT(*) as count FROM conversations')
-        total_conversations = cursor.fetchone()['count']
+        (total_conversations,) = cursor.execute('SELECT COUNT(*) FROM conversations').fetchone()
         
-        # Messages today
-        cursor.execute('''
-            SELECT COUNT(*) as count FROM messages
-            WHERE DATE(received_at) = DATE('now')
-        ''')
-        messages_today = cursor.fetchone()['count']
+        # Messages today (received_at is 'YYYY-MM-DD HH:MM:SS' UTC text, so a
+        # range from today's date uses idx_received instead of DATE() on every row)
+        (messages_today,) = cursor.execute('''
+            SELECT COUNT(*) FROM messages
+            WHERE received_at >= DATE('now')
+        ''').fetchone()
         
         # Top senders
         cursor.execute('''
@@ -427,9 +645,8 @@ class Database:
             ORDER BY count DESC
             LIMIT 10
         ''')
-        top_senders = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
+        columns = _column_names(cursor)
+        top_senders = [dict(zip(columns, row)) for row in cursor]
         
         return {
             'total_messages': total_messages,
@@ -461,16 +678,16 @@ class Database:
             Log entry ID
         """
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO sent_messages (
-                recipient, message_body, attachment_path, status, error_message
-            ) VALUES (?, ?, ?, ?, ?)
-        ''', (recipient, message_body, attachment_path, status, error_message))
-        
-        log_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        # Commits on success, rolls back if a statement fails
+        with conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT INTO sent_messages (
+                    recipient, message_body, attachment_path, status, error_message
+                ) VALUES (?, ?, ?, ?, ?)
+            ''', (recipient, message_body, attachment_path, status, error_message))
+            
+            log_id = cursor.lastrowid
         
         return log_id
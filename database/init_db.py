@@ -11,6 +11,9 @@ from pathlib import Path
 SCHEMA_VERSION = 1
 
 SCHEMA_SQL = """
+-- Write-ahead logging (persistent) so the services can read while writing
+PRAGMA journal_mode=WAL;
+
 -- Messages table
 CREATE TABLE IF NOT EXISTS messages (
     id INTEGER PRIMARY KEY AUTOINCREMENT,